@@ -11,6 +11,7 @@ import os
 from wordcloud import WordCloud
 import matplotlib.pyplot as plt
 import html
+from thumbnails import get_thumbnail, get_thumbnails, placeholder_thumbnail, to_data_uri
 
 # HTMLエスケープ関数
 def escape_html(text):
@@ -531,10 +532,14 @@ elif st.session_state.page == "results":
     if res.empty:
         st.markdown('<div style="text-align:center;color:#FFFFFF;font-size:16px;margin:50px 0;">該当する本がありませんでした。</div>', unsafe_allow_html=True)
     else:
+        rakuten_list = [fetch_rakuten_book(row.get("isbn", "")) for _, row in res.iterrows()]
+        # 書影は描画前にまとめて並列取得する（成功分はディスクにキャッシュされ、失敗分は次回再取得する）
+        thumbs = get_thumbnails([r.get("cover", "") for r in rakuten_list], "card")
+        placeholder_src = to_data_uri(placeholder_thumbnail("card"))
         for i, (_, row) in enumerate(res.iterrows()):
-            rakuten = fetch_rakuten_book(row.get("isbn", ""))
-            placeholder_cover = "https://via.placeholder.com/116x105/666666/FFFFFF?text=No+Image"
-            cover_url = rakuten.get("cover") or placeholder_cover
+            rakuten = rakuten_list[i]
+            thumb = thumbs.get(rakuten.get("cover", ""))
+            cover_src = to_data_uri(thumb) if thumb else placeholder_src
             genres = row.get('genres_list', [])
             # ジャンルタグのHTMLエスケープ
             escaped_genres = [escape_html(g) for g in genres]
@@ -549,7 +554,7 @@ elif st.session_state.page == "results":
             <div class="result-card">
                 <div class="card-content-row">
                     <div class="card-thumbnail">
-                        <img src="{cover_url}" alt="{escaped_title}" />
+                        <img src="{cover_src}" alt="{escaped_title}" />
                     </div>
                     <div class="card-meta" style="display: flex; flex-direction: column; justify-content: center;">
                         <div>ジャンル</div>
@@ -587,7 +592,7 @@ elif st.session_state.page == "detail":
         with col1:
             cover_url = rakuten.get("cover")
             if cover_url:
-                st.image(cover_url, width=100)
+                st.image(get_thumbnail(cover_url, "detail") or placeholder_thumbnail("detail"), width=100)
         with col2:
             url = rakuten.get("affiliateUrl") or rakuten.get("itemUrl")
             if url:
@@ -0,0 +1 @@
+# テストからリポジトリ直下のモジュール（thumbnails.py など）をimportできるようにする
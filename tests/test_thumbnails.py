@@ -0,0 +1,121 @@
+"""thumbnails.py をローカルのスタブ画像サーバーに対してテストする"""
+import http.server
+import io
+import threading
+
+import pytest
+from PIL import Image
+
+import thumbnails
+
+
+def _jpeg(size, color=(200, 10, 10)) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, format="JPEG", quality=95)
+    return buf.getvalue()
+
+
+def _png(size=(150, 200)) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", size, (10, 200, 10)).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _broken_ihdr_png() -> bytes:
+    # IHDRチャンクの長さを1バイトに書き換える（Pillowは ValueError を送出する）
+    data = _png()
+    return data[:8] + (1).to_bytes(4, "big") + data[12:]
+
+
+def _broken_chunk_png() -> bytes:
+    # IDATチャンクの長さを0に書き換える（Pillowは SyntaxError を送出する）
+    data = _png()
+    i = data.index(b"IDAT")
+    return data[:i - 4] + (0).to_bytes(4, "big") + data[i:]
+
+
+ROUTES = {
+    "/tall.jpg": (200, "image/jpeg", _jpeg((600, 900))),
+    "/wide.jpg": (200, "image/jpeg", _jpeg((900, 300))),
+    "/text.html": (200, "text/html", b"<html>not an image</html>"),
+    "/truncated.jpg": (200, "image/jpeg", _jpeg((600, 900))[:500]),
+    "/broken_ihdr.png": (200, "image/png", _broken_ihdr_png()),
+    "/broken_chunk.png": (200, "image/png", _broken_chunk_png()),
+}
+
+
+@pytest.fixture
+def stub_server():
+    hits = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            if self.path not in ROUTES:
+                self.send_response(404)
+                self.end_headers()
+                return
+            status, content_type, body = ROUTES[self.path]
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", hits
+    server.shutdown()
+    server.server_close()
+
+
+def _size(data: bytes):
+    return Image.open(io.BytesIO(data)).size
+
+
+def test_card_is_center_cropped_to_card_box(stub_server, tmp_path):
+    base, _ = stub_server
+    expected = (116 * thumbnails.THUMB_SCALE, 105 * thumbnails.THUMB_SCALE)
+    for name in ("tall.jpg", "wide.jpg"):
+        data = thumbnails.get_thumbnail(f"{base}/{name}", "card", cache_dir=str(tmp_path))
+        assert _size(data) == expected
+
+
+def test_detail_keeps_aspect_ratio(stub_server, tmp_path):
+    base, _ = stub_server
+    tall = thumbnails.get_thumbnail(f"{base}/tall.jpg", "detail", cache_dir=str(tmp_path))
+    wide = thumbnails.get_thumbnail(f"{base}/wide.jpg", "detail", cache_dir=str(tmp_path))
+    assert _size(tall) == (187, 280)
+    assert _size(wide) == (200, 67)
+
+
+def test_second_call_is_served_from_cache(stub_server, tmp_path):
+    base, hits = stub_server
+    url = f"{base}/tall.jpg"
+    card = thumbnails.get_thumbnail(url, "card", cache_dir=str(tmp_path))
+    assert thumbnails.get_thumbnail(url, "card", cache_dir=str(tmp_path)) == card
+    assert thumbnails.get_thumbnail(url, "detail", cache_dir=str(tmp_path)) is not None
+    assert hits == ["/tall.jpg"]
+
+
+@pytest.mark.parametrize("name", ["missing.jpg", "text.html", "truncated.jpg", "broken_ihdr.png", "broken_chunk.png"])
+def test_bad_responses_return_none(stub_server, tmp_path, name):
+    base, _ = stub_server
+    assert thumbnails.get_thumbnail(f"{base}/{name}", "card", cache_dir=str(tmp_path)) is None
+
+
+def test_get_thumbnails_skips_failed_urls(stub_server, tmp_path):
+    base, _ = stub_server
+    urls = [f"{base}/{name}" for name in ("tall.jpg", "broken_chunk.png", "missing.jpg", "wide.jpg", "tall.jpg")]
+    thumbs = thumbnails.get_thumbnails(urls + [""], "card", cache_dir=str(tmp_path))
+    assert set(thumbs) == {f"{base}/tall.jpg", f"{base}/wide.jpg"}
+
+
+def test_placeholder_size():
+    for size, (width, height) in thumbnails.THUMB_SIZES.items():
+        expected = (width * thumbnails.THUMB_SCALE, height * thumbnails.THUMB_SCALE)
+        assert _size(thumbnails.placeholder_thumbnail(size)) == expected
@@ -0,0 +1,188 @@
+"""書影サムネイルの生成とローカルキャッシュ
+
+楽天ブックスの書影を一度だけ取得し、表示サイズに縮小・再圧縮して
+コンテンツアドレス方式（元画像のSHA-256）でディスクに保存する。
+"""
+import base64
+import hashlib
+import io
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional
+
+import requests
+from PIL import Image, ImageDraw, ImageFont
+
+# 表示サイズ（CSSピクセル）。高DPI端末向けに THUMB_SCALE 倍で生成する
+THUMB_SIZES = {
+    "card": (116, 105),    # 検索結果カード
+    "detail": (100, 140),  # 詳細画面（幅100px）
+}
+THUMB_SCALE = 2
+JPEG_QUALITY = 80
+FETCH_TIMEOUT = 3  # 書影1枚あたりのタイムアウト（秒）
+FETCH_WORKERS = 8  # 並列取得のスレッド数
+CACHE_DIR = os.environ.get("THUMB_CACHE_DIR", ".thumb_cache")
+PLACEHOLDER_BG = (102, 102, 102)
+PLACEHOLDER_FG = (255, 255, 255)
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """一時ファイル経由で書き込み、途中状態のファイルを残さない"""
+    # Streamlitは1プロセス内の複数スレッドでセッションを処理するため、PIDではなくmkstempで一意にする
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _ref_path(url: str, cache_dir: str) -> str:
+    """URL → 元画像ダイジェストの対応を保存するファイルのパス"""
+    return os.path.join(cache_dir, "refs", _sha256(url.encode("utf-8")))
+
+
+def _thumb_path(digest: str, size: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, digest[:2], f"{digest}_{size}.jpg")
+
+
+def _flatten(img: Image.Image) -> Image.Image:
+    """透過部分を白背景に合成してRGBにする（JPEGは透過を持てず、そのままだと黒くなる）"""
+    if img.mode == "P" and "transparency" in img.info:
+        img = img.convert("RGBA")
+    if img.mode in ("RGBA", "LA", "PA"):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        return background
+    return img.convert("RGB")
+
+
+def _render(img: Image.Image, size: str) -> bytes:
+    """指定サイズに縮小してJPEGに再圧縮する"""
+    width, height = THUMB_SIZES[size]
+    box = (width * THUMB_SCALE, height * THUMB_SCALE)
+    img = _flatten(img)
+    if size == "card":
+        # カードは枠いっぱいに表示するため中央で切り抜く（object-fit: cover 相当）
+        src_ratio = img.width / img.height
+        dst_ratio = box[0] / box[1]
+        if src_ratio > dst_ratio:
+            new_w = round(img.height * dst_ratio)
+            left = (img.width - new_w) // 2
+            img = img.crop((left, 0, left + new_w, img.height))
+        elif src_ratio < dst_ratio:
+            new_h = round(img.width / dst_ratio)
+            top = (img.height - new_h) // 2
+            img = img.crop((0, top, img.width, top + new_h))
+        if img.width > box[0]:
+            img = img.resize(box, Image.LANCZOS)
+    else:
+        # 詳細画面は縦横比を保ったまま幅に合わせる
+        img.thumbnail(box, Image.LANCZOS)
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def _fetch_and_store(url: str, cache_dir: str, timeout: float) -> Optional[dict[str, bytes]]:
+    """書影を取得して全サイズのサムネイルを生成・保存し、サイズごとのJPEGバイト列を返す"""
+    try:
+        res = requests.get(url, timeout=timeout)
+    except requests.exceptions.RequestException:
+        return None
+    if res.status_code != 200:
+        return None
+    # 壊れた画像ではPillowがOSError以外（SyntaxError・ValueErrorなど）も送出するため、
+    # デコード・縮小の失敗はすべて「書影なし」として扱う
+    try:
+        img = Image.open(io.BytesIO(res.content))
+        img.load()
+        thumbs = {size: _render(img, size) for size in THUMB_SIZES}
+    except Exception:
+        return None
+
+    # 保存に失敗しても（読み取り専用ディレクトリ・ディスク容量不足など）生成済みの画像は返す
+    digest = _sha256(res.content)
+    try:
+        os.makedirs(os.path.join(cache_dir, digest[:2]), exist_ok=True)
+        for size, data in thumbs.items():
+            path = _thumb_path(digest, size, cache_dir)
+            if not os.path.exists(path):
+                _write_atomic(path, data)
+        os.makedirs(os.path.join(cache_dir, "refs"), exist_ok=True)
+        _write_atomic(_ref_path(url, cache_dir), digest.encode("ascii"))
+    except OSError:
+        pass
+    return thumbs
+
+
+def get_thumbnail(url: str, size: str = "card", cache_dir: str = CACHE_DIR, timeout: float = FETCH_TIMEOUT) -> Optional[bytes]:
+    """書影URLからサムネイルのJPEGバイト列を取得する（取得できない場合はNone）"""
+    if size not in THUMB_SIZES:
+        raise ValueError(f"不明なサムネイルサイズです: {size}")
+    if not url:
+        return None
+
+    ref_path = _ref_path(url, cache_dir)
+    try:
+        with open(ref_path, encoding="ascii") as f:
+            digest = f.read().strip()
+    except OSError:
+        digest = None
+
+    if digest:
+        try:
+            with open(_thumb_path(digest, size, cache_dir), "rb") as f:
+                return f.read()
+        except OSError:
+            pass  # キャッシュが一部欠けている・読めない場合は取り直す
+
+    thumbs = _fetch_and_store(url, cache_dir, timeout)
+    if not thumbs:
+        return None
+    return thumbs[size]
+
+
+def get_thumbnails(urls: list[str], size: str = "card", cache_dir: str = CACHE_DIR, timeout: float = FETCH_TIMEOUT) -> dict[str, bytes]:
+    """複数の書影URLのサムネイルを並列に取得する（取得できなかったURLは含めない）"""
+    unique_urls = list(dict.fromkeys(u for u in urls if u))
+    if not unique_urls:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(unique_urls))) as executor:
+        thumbs = executor.map(lambda u: get_thumbnail(u, size, cache_dir, timeout), unique_urls)
+        return {u: t for u, t in zip(unique_urls, thumbs) if t}
+
+
+@lru_cache(maxsize=None)
+def placeholder_thumbnail(size: str = "card") -> bytes:
+    """書影がない場合のプレースホルダー画像をローカルで生成する"""
+    width, height = THUMB_SIZES[size]
+    box = (width * THUMB_SCALE, height * THUMB_SCALE)
+    img = Image.new("RGB", box, PLACEHOLDER_BG)
+    draw = ImageDraw.Draw(img)
+    text = "No Image"
+    font = ImageFont.load_default()
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+    pos = ((box[0] - (right - left)) // 2 - left, (box[1] - (bottom - top)) // 2 - top)
+    draw.text(pos, text, fill=PLACEHOLDER_FG, font=font)
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    return buf.getvalue()
+
+
+def to_data_uri(data: bytes) -> str:
+    """JPEGバイト列をimgタグに埋め込めるdata URIに変換する"""
+    return "data:image/jpeg;base64," + base64.b64encode(data).decode("ascii")